@@ -1,13 +1,13 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from io import BytesIO
-import re
 
 # ---------------------------
 # Helpers
 # ---------------------------
 
-DENOMS_EUR = [100, 50, 20, 10, 5, 2, 1, 0.50, 0.20, 0.10, 0.05, 0.02, 0.01]
+DENOMS_EUR = (100, 50, 20, 10, 5, 2, 1, 0.50, 0.20, 0.10, 0.05, 0.02, 0.01)
 
 def euro_label(n: float) -> str:
     # Pretty labels in Slovak, keep € sign
@@ -17,21 +17,17 @@ def euro_label(n: float) -> str:
     cents = int(round(n * 100))
     return f"{cents} c"
 
-DENOM_LABELS = [euro_label(d) for d in DENOMS_EUR]
+DENOM_LABELS = tuple(euro_label(d) for d in DENOMS_EUR)
+# The smallest coin is 1 c, so the greedy breakdown always adds up to the amount exactly
+DENOMS_CENTS = tuple(int(round(d * 100)) for d in DENOMS_EUR)
 
-def to_cents(amount_eur: float) -> int:
-    # robust enough for UI numbers; Streamlit gives float
-    return int(round(amount_eur * 100))
+def to_cents(amount_eur: np.ndarray) -> np.ndarray:
+    # robust enough for UI numbers; amounts are kept as float64 EUR
+    return np.round(amount_eur * 100).astype(np.int64)
 
-def cents_to_eur(cents: int) -> float:
+def cents_to_eur(cents: np.ndarray) -> np.ndarray:
     return cents / 100.0
 
-def format_eur_sk(amount: float) -> str:
-    # Slovak style: space as thousands separator, comma as decimal separator (e.g., 123 456,00)
-    s = f"{amount:,.2f}"          # e.g., 123,456.00
-    s = s.replace(",", " ")       # e.g., 123 456.00
-    return s.replace(".", ",")    # e.g., 123 456,00
-    
 def parse_amount_sk(raw: str) -> tuple[bool, float, str]:
     """
     Accepts:
@@ -50,10 +46,11 @@ def parse_amount_sk(raw: str) -> tuple[bool, float, str]:
         return True, 0.0, ""
 
     # Allow digits with optional decimal part using , or .
-    if not re.fullmatch(r"\d+([,.]\d{0,2})?", s):
-        return False, 0.0, "Zadajte číslo vo formáte napr. 123 456,00 (max. 2 desatinné miesta)."
-        
     s = s.replace(",", ".")
+    int_part, _, frac_part = s.partition(".")
+    if not int_part.isdecimal() or len(frac_part) > 2 or (frac_part and not frac_part.isdecimal()):
+        return False, 0.0, "Zadajte číslo vo formáte napr. 123 456,00 (max. 2 desatinné miesta)."
+
     try:
         val = float(s)
     except ValueError:
@@ -77,34 +74,52 @@ def idx_to_person_code(idx: int) -> str:
         s = chr(65 + rem) + s
     return s
 
-def compute_breakdown(amount_cents: int) -> dict:
+MAX_PERSONS = 100
+PERSON_CODES = tuple(idx_to_person_code(i) for i in range(MAX_PERSONS))
+
+def compute_breakdown(amounts_cents: np.ndarray) -> np.ndarray:
+    """
+    Returns int64 matrix of counts, shape (persons, denoms), columns in DENOM_LABELS order.
+    Greedy from highest to lowest, all persons at once.
+    """
+    remainder = amounts_cents.astype(np.int64, copy=True)
+    counts = np.empty((len(remainder), len(DENOMS_CENTS)), dtype=np.int64)
+    for i, denom_cents in enumerate(DENOMS_CENTS):
+        counts[:, i] = remainder // denom_cents
+        remainder %= denom_cents
+    return counts
+
+def build_persons_editor_df(codes: list) -> pd.DataFrame:
+    """
+    One row per new person for st.data_editor, amount left blank for the user to type.
+    """
+    return pd.DataFrame({
+        "Osoba": codes,
+        "Suma (EUR)": [""] * len(codes),
+        "Zmazať": np.zeros(len(codes), dtype=bool),
+    })
+
+def apply_editor_edits(editor_df: pd.DataFrame, editor_state: dict) -> pd.DataFrame:
+    """
+    Returns a copy of the editor's base rows with the user's cell edits (widget state, may be None) applied.
     """
-    Returns dict {denom_label: count, ...}, greedy from highest to lowest.
+    view_df = editor_df.copy()
+    if editor_state:
+        for row, changes in editor_state["edited_rows"].items():
+            for col, value in changes.items():
+                view_df.at[int(row), col] = value
+    return view_df
+
+def append_blank_rows(view_df: pd.DataFrame, codes: tuple) -> pd.DataFrame:
     """
-    remainder = amount_cents
-    out = {}
-    for denom in DENOMS_EUR:
-        denom_cents = int(round(denom * 100))
-        cnt = remainder // denom_cents
-        out[euro_label(denom)] = int(cnt)
-        remainder -= int(cnt) * denom_cents
-    return out
-
-def breakdown_value_cents(breakdown: dict) -> int:
-    total = 0
-    for denom, cnt in breakdown.items():
-        # denom is like "50 €" or "20 c"
-        if "€" in denom:
-            v = int(denom.replace("€", "").strip())
-            total += v * 100 * cnt
-        else:
-            v = int(denom.replace("c", "").strip())
-            total += v * cnt
-    return total
+    Adds editor rows with blank amounts for new persons, keeping the text of existing rows.
+    """
+    return pd.concat([view_df, build_persons_editor_df(list(codes))], ignore_index=True)
 
 def build_excel(per_person_df: pd.DataFrame, summary_df: pd.DataFrame) -> bytes:
     bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
+    # pandas imports xlsxwriter only here, on first build; keep it out of the module imports
+    with pd.ExcelWriter(bio, engine="xlsxwriter") as writer:
         per_person_df.to_excel(writer, index=False, sheet_name="Osoby")
         summary_df.to_excel(writer, index=False, sheet_name="Súhrn")
     return bio.getvalue()
@@ -113,16 +128,25 @@ def build_excel(per_person_df: pd.DataFrame, summary_df: pd.DataFrame) -> bytes:
 # Session state init
 # ---------------------------
 
-if "persons" not in st.session_state:
-    st.session_state.persons = []  # list of dicts: {"id": int, "code": str, "amount": float}
-if "next_id" not in st.session_state:
-    st.session_state.next_id = 1
+# Persons are stored as parallel arrays, one entry per person
+if "person_codes" not in st.session_state:
+    st.session_state.person_codes = []
+if "person_amounts" not in st.session_state:
+    st.session_state.person_amounts = np.zeros(0, dtype=np.float64)  # NaN = not filled in yet
 if "calculated" not in st.session_state:
     st.session_state.calculated = False
 if "per_person_df" not in st.session_state:
     st.session_state.per_person_df = None
 if "summary_df" not in st.session_state:
     st.session_state.summary_df = None
+if "excel_bytes" not in st.session_state:
+    st.session_state.excel_bytes = None
+if "editor_df" not in st.session_state:
+    st.session_state.editor_df = None  # base rows of the persons editor, replaced when rows are added/deleted
+if "editor_version" not in st.session_state:
+    st.session_state.editor_version = 0
+if "calc_key" not in st.session_state:
+    st.session_state.calc_key = None  # inputs of the last calculation
 
 # ---------------------------
 # UI
@@ -137,160 +161,152 @@ st.caption(
     "Formát čísla: 123 456,00 (medzery pre tisíce, čiarka pre centy)."
 )
 
-# Controls
-c1, c2, c3 = st.columns([1, 1, 3])
-with c1:
-    if st.button("➕ Pridať osobu", use_container_width=True):
-        if len(st.session_state.persons) < 100:
-            code = idx_to_person_code(len(st.session_state.persons))
-            st.session_state.persons.append({"id": st.session_state.next_id, "code": code, "amount": None})
-            st.session_state.next_id += 1
-            st.session_state.calculated = False
-        else:
-            st.warning("Limit je 100 osôb.")
-
-with c2:
-    if st.button("➕➕ Pridať 10 osôb", use_container_width=True):
-        remaining = 100 - len(st.session_state.persons)
-        add_n = min(10, remaining)
-        if add_n <= 0:
-            st.warning("Limit je 100 osôb.")
-        else:
-            for _ in range(add_n):
-                code = idx_to_person_code(len(st.session_state.persons))
-                st.session_state.persons.append({"id": st.session_state.next_id, "code": code, "amount": None})
-                st.session_state.next_id += 1
-            st.session_state.calculated = False
-
-with c3:
-    st.write("")
-
-st.divider()
-
-if len(st.session_state.persons) == 0:
-    st.info("Zatiaľ nemáte pridanú žiadnu osobu. Kliknite na „Pridať osobu“.")
-else:
-    st.subheader("Osoby a sumy")
-
-    # Header row
-    h1, h2, h3, h4 = st.columns([1, 3, 2, 1])
-    h1.markdown("**Osoba**")
-    h2.markdown("**Suma (EUR)**")
-    h3.markdown("**Poznámka**")
-    h4.markdown("**Akcie**")
-
-    to_delete_ids = set()
-    validation_errors = []
-
-    for p in st.session_state.persons:
-        col1, col2, col3, col4 = st.columns([1, 3, 2, 1])
-
-        col1.write(p["code"])
-
-        # Text input with comma decimals (displayed with comma)
-        default_txt = "" if p["amount"] is None else format_eur_sk(float(p["amount"]))
-        raw = col2.text_input(
-            label=f"Suma pre {p['code']}",
-            value=default_txt,
-            key=f"amt_txt_{p['id']}",
-            label_visibility="collapsed",
-            placeholder="napr. 123 456,00",
-        )
+if st.session_state.editor_df is None:
+    st.session_state.editor_df = build_persons_editor_df(st.session_state.person_codes)
+# Persons editor as the user currently sees it
+view_df = apply_editor_edits(
+    st.session_state.editor_df, st.session_state.get(f"persons_editor_{st.session_state.editor_version}")
+)
 
-        ok, val, err = parse_amount_sk(raw)
-        if ok:
-            # Keep None if the input is empty, so new persons stay blank until user types a value
-            if raw is None or raw.strip() == "":
-                if p["amount"] is not None:
-                    p["amount"] = None
-                    st.session_state.calculated = False
-            else:
-                if p["amount"] is None or val != p["amount"]:
-                    p["amount"] = val
-                    st.session_state.calculated = False
-        else:
-            validation_errors.append((p["code"], err))
-            col2.error(err)
-
-        col3.caption("Formát: 123 456,00 (max. 2 desatinné miesta).")
-        
-        if col4.button("🗑️ Zmazať", key=f"del_{p['id']}", use_container_width=True):
-            to_delete_ids.add(p["id"])
-
-    # Block calculation if any amount is still empty (None)
-    if any(p["amount"] is None for p in st.session_state.persons):
-        validation_errors.append(("_EMPTY_", "Vyplňte sumu pre všetky osoby (prázdne pole nie je povolené)."))
-    
-    if to_delete_ids:
-        st.session_state.persons = [p for p in st.session_state.persons if p["id"] not in to_delete_ids]
+# "Zmazať označené" drops the rows ticked "Zmazať" in the persons editor before anything
+# is rendered, so the shorter list shows up in this same run (no extra st.rerun round-trip)
+delete_mask = view_df["Zmazať"].to_numpy(dtype=bool)
+if st.session_state.get("delete_btn") and delete_mask.any():
+    keep = (~delete_mask).tolist()
+    st.session_state.person_codes = [code for code, k in zip(st.session_state.person_codes, keep) if k]
+    st.session_state.person_amounts = st.session_state.person_amounts[~delete_mask]
+    # Keep the typed text of the remaining rows; amounts are re-read from it below
+    st.session_state.editor_df = view_df[~delete_mask].assign(Zmazať=False).reset_index(drop=True)
+    st.session_state.editor_version += 1
+    view_df = st.session_state.editor_df
+    st.session_state.calculated = False
+
+# Add buttons live in the persons form below, so pending cell edits are submitted with them;
+# handle them here, before anything is rendered, so the new rows show up in this same run
+if st.session_state.get("add_one_btn"):
+    add_requested = 1
+elif st.session_state.get("add_ten_btn"):
+    add_requested = 10
+else:
+    add_requested = 0
+if add_requested:
+    start_idx = len(st.session_state.person_codes)
+    add_n = min(add_requested, MAX_PERSONS - start_idx)
+    if add_n <= 0:
+        st.warning("Limit je 100 osôb.")
+    else:
+        st.session_state.person_codes.extend(PERSON_CODES[start_idx:start_idx + add_n])
+        st.session_state.person_amounts = np.append(st.session_state.person_amounts, np.full(add_n, np.nan))
+        # Keep the text typed so far (even unparsable) and add blank rows below it
+        st.session_state.editor_df = append_blank_rows(view_df, PERSON_CODES[start_idx:start_idx + add_n])
+        st.session_state.editor_version += 1
         st.session_state.calculated = False
-        st.rerun()
+
+# Set inside the form only when there are persons to edit
+calc_pressed = False
+validation_errors = []
+
+# Edits are sent to the server only on submit (any button below), not on every cell change
+with st.form("persons_form", clear_on_submit=False, border=False):
+    # Controls
+    c1, c2, c3 = st.columns([1, 1, 3])
+    with c1:
+        st.form_submit_button("➕ Pridať osobu", key="add_one_btn", use_container_width=True)
+    with c2:
+        st.form_submit_button("➕➕ Pridať 10 osôb", key="add_ten_btn", use_container_width=True)
+    with c3:
+        st.write("")
 
     st.divider()
 
-    # Calculate
-    calc_col1, calc_col2, calc_col3 = st.columns([1, 1, 3])
-    with calc_col1:
-        do_calc = st.button(
-            "🧮 Vypočítať",
+    if len(st.session_state.person_codes) == 0:
+        st.info("Zatiaľ nemáte pridanú žiadnu osobu. Kliknite na „Pridať osobu“.")
+    else:
+        st.subheader("Osoby a sumy")
+
+        # One editor for all persons instead of a widget per row
+        st.caption("Formát: 123 456,00 (max. 2 desatinné miesta).")
+        edited_df = st.data_editor(
+            st.session_state.editor_df,
+            column_config={
+                "Osoba": st.column_config.TextColumn("Osoba", disabled=True),
+                "Suma (EUR)": st.column_config.TextColumn("Suma (EUR)", help="napr. 123 456,00"),
+                "Zmazať": st.column_config.CheckboxColumn("🗑️ Zmazať"),
+            },
+            num_rows="fixed",
+            hide_index=True,
             use_container_width=True,
-            disabled=(len(validation_errors) > 0),
+            key=f"persons_editor_{st.session_state.editor_version}",
         )
-    with calc_col2:
-        st.write("")
-    with calc_col3:
-        if validation_errors:
-            st.warning("Opravte chyby v sumách vyššie — potom bude možné vypočítať.")
-        else:
-            st.write("")
+
+        amounts = st.session_state.person_amounts
+
+        for i, (code, raw) in enumerate(zip(st.session_state.person_codes, edited_df["Suma (EUR)"].tolist())):
+            ok, val, err = parse_amount_sk(raw)
+            if ok:
+                # Keep NaN if the input is empty, so new persons stay blank until user types a value
+                if raw is None or raw.strip() == "":
+                    if not np.isnan(amounts[i]):
+                        amounts[i] = np.nan
+                        st.session_state.calculated = False
+                else:
+                    if np.isnan(amounts[i]) or val != amounts[i]:
+                        amounts[i] = val
+                        st.session_state.calculated = False
+            else:
+                validation_errors.append((code, err))
+                st.error(f"{code}: {err}")
+
+        # Block calculation if any amount is still empty (NaN)
+        if np.isnan(amounts).any():
+            validation_errors.append(("_EMPTY_", "Vyplňte sumu pre všetky osoby (prázdne pole nie je povolené)."))
+
+        st.divider()
+
+        # Calculate / delete ticked rows
+        calc_col1, calc_col2, calc_col3 = st.columns([1, 1, 3])
+        with calc_col1:
+            calc_pressed = st.form_submit_button("🧮 Vypočítať", use_container_width=True)
+        with calc_col2:
+            st.form_submit_button("🗑️ Zmazať označené", key="delete_btn", use_container_width=True)
+        with calc_col3:
+            if validation_errors:
+                st.warning("Opravte chyby v sumách vyššie — potom bude možné vypočítať.")
+            else:
+                st.write("")
+
+if len(st.session_state.person_codes) > 0:
+    # Only the Vypočítať button runs the breakdown; errors can only be fixed by
+    # submitting again, so the button stays enabled
+    do_calc = calc_pressed and not validation_errors
 
     if do_calc:
-        rows = []
-        summary_counts = {lbl: 0 for lbl in DENOM_LABELS}
-        summary_total_cents = 0
-
-        for p in st.session_state.persons:
-            amt_cents = to_cents(float(p["amount"]))
-            breakdown = compute_breakdown(amt_cents)
-            computed_cents = breakdown_value_cents(breakdown)
-
-            row = {"Osoba": p["code"], "Suma (EUR)": round(cents_to_eur(amt_cents), 2)}
-            for lbl in DENOM_LABELS:
-                row[lbl] = breakdown.get(lbl, 0)
-                summary_counts[lbl] += breakdown.get(lbl, 0)
-
-            row["Kontrola (EUR)"] = round(cents_to_eur(computed_cents), 2)
-            row["Rozdiel (EUR)"] = round(cents_to_eur(amt_cents - computed_cents), 2)
-            rows.append(row)
-
-            summary_total_cents += computed_cents
-
-        per_person_df = pd.DataFrame(rows)
-
-        # Summary table: counts and value per denom
-        sum_rows = []
-        for denom, lbl in zip(DENOMS_EUR, DENOM_LABELS):
-            cnt = summary_counts[lbl]
-            denom_cents = int(round(denom * 100))
-            value_cents = cnt * denom_cents
-            sum_rows.append({
-                "Nominál": lbl,
-                "Počet kusov": cnt,
-                "Suma (EUR)": round(cents_to_eur(value_cents), 2),
+        # Same persons and amounts as the last calculation -> results are still valid
+        calc_key = (tuple(st.session_state.person_codes), st.session_state.person_amounts.tobytes())
+        if calc_key != st.session_state.calc_key:
+            amounts_cents = to_cents(st.session_state.person_amounts)
+            counts = compute_breakdown(amounts_cents)
+
+            # Build the per-person table column by column
+            data = {"Osoba": st.session_state.person_codes, "Suma (EUR)": cents_to_eur(amounts_cents).round(2)}
+            for i, lbl in enumerate(DENOM_LABELS):
+                data[lbl] = counts[:, i]
+            per_person_df = pd.DataFrame(data)
+
+            # Summary table: counts and value per denom, plus the SPOLU row
+            totals = counts.sum(axis=0)
+            value_cents = totals * np.asarray(DENOMS_CENTS, dtype=np.int64)
+            summary_df = pd.DataFrame({
+                "Nominál": [*DENOM_LABELS, "SPOLU"],
+                "Počet kusov": np.append(totals, totals.sum()),
+                "Suma (EUR)": cents_to_eur(np.append(value_cents, value_cents.sum())).round(2),
             })
 
-        summary_df = pd.DataFrame(sum_rows)
-        summary_df = pd.concat(
-            [summary_df, pd.DataFrame([{
-                "Nominál": "SPOLU",
-                "Počet kusov": int(summary_df["Počet kusov"].sum()),
-                "Suma (EUR)": round(cents_to_eur(summary_total_cents), 2),
-            }])],
-            ignore_index=True
-        )
-
-        st.session_state.per_person_df = per_person_df
-        st.session_state.summary_df = summary_df
+            st.session_state.per_person_df = per_person_df
+            st.session_state.summary_df = summary_df
+            # Build the workbook once per calculation, not on every rerun
+            st.session_state.excel_bytes = build_excel(per_person_df, summary_df)
+            st.session_state.calc_key = calc_key
         st.session_state.calculated = True
 
     # Results + Download
@@ -305,11 +321,9 @@ else:
 
         st.divider()
 
-        excel_bytes = build_excel(st.session_state.per_person_df, st.session_state.summary_df)
-
         st.download_button(
             label="⬇️ Stiahnuť report (Excel .xlsx)",
-            data=excel_bytes,
+            data=st.session_state.excel_bytes,
             file_name="rozpis_bankoviek_a_minci.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True,